@@ -84,6 +84,8 @@ class Agent:
             Q Table for Q-Learning.
         env:
             Game environment class instance.
+        recorder:
+            Frame recorder class instance, or None when not recording.
     """
     class Status:
         """Status of agent after training.
@@ -94,8 +96,14 @@ class Agent:
         """
         QUIT, DONE_TRAINING = 1, 2
 
-    def __init__(self, level):
-        """Initialise Q-Learning params."""
+    def __init__(self, level, headless=False, recorder=None):
+        """Initialise Q-Learning params.
+
+        Args:
+            level: Game level, either be "easy" or "hard".
+            headless: Draw the game offscreen without opening a window.
+            recorder: Optional FrameRecorder to save selected episodes and the final greedy rollout.
+        """
         if level == "easy":
             _level = Level.EASY
         elif level == "hard":
@@ -103,7 +111,8 @@ class Agent:
         # Default level
         else:
             _level = Level.EASY
-        self.env = Environment(_level)
+        self.env = Environment(_level, headless)
+        self.recorder = recorder
         self.init_params()
         self.init_q_table()
         self.init_plot_config()
@@ -123,6 +132,19 @@ class Agent:
         self.discounting_gamma=0.9
         self.decay_rate=0.002
 
+        # Learning rate schedule: "constant" uses learning_alpha for every update,
+        # "count" uses alpha = 1/n(s,a)^alpha_power, never dropping below min_alpha.
+        # The count schedules converge faster on the easy level but slower on the hard level, so they are opt-in.
+        self.alpha_schedule="constant"
+        self.alpha_power=0.8
+        self.min_alpha=0.01
+
+        # Exploration schedule: "decay" uses the global decaying epsilon,
+        # "count" uses a per-state epsilon = exploration_c/sqrt(n(s)), never dropping below min_epsilon.
+        self.exploration_schedule="decay"
+        self.exploration_c=1.0
+        self.min_epsilon=0.01
+
 
 
     def init_q_table(self):
@@ -148,6 +170,20 @@ class Agent:
             for action in actions.keys():
                 self.q_table[state][action] = 0
 
+        # Cache of possible actions, best possible-action Q value and its maximal actions per state.
+        # Format: {state: [action, ...]}, {state: q_value}, {state: [action, ...]}
+        self.possible_actions = {}
+        self.max_q = {}
+        self.max_actions = {}
+        for state in states:
+            self.possible_actions[state] = self.env.get_possible_actions(state)
+            self.max_q[state] = 0
+            self.max_actions[state] = list(self.possible_actions[state])
+
+        # Visit counters indexed by [x, y, action_number] and [x, y].
+        self.state_action_visits = np.zeros((grid_size, grid_size, len(actions)), dtype=np.uint32)
+        self.state_visits = np.zeros((grid_size, grid_size), dtype=np.uint32)
+
     def init_plot_config(self):
         """Initialise variables for plotting figures.
 
@@ -157,6 +193,13 @@ class Agent:
         self.accumulate_reward=[]
         self.episode_reward=0
 
+        # Training stats: environment steps taken per episode, and the total
+        # step count at which the greedy policy last changed.
+        self.episode_steps=[]
+        self.total_steps=0
+        self.policy_stable_step=0
+        self.greedy_policy={}
+
     def plot(self):
         """Plot Q-Learning figures as required in the Task 4.
 
@@ -186,41 +229,12 @@ class Agent:
         x = random.uniform(0,1)
 
 
-        if x >= self.epsilon:
-
-
-            # Init Q Table with the format: {state: {action: q_value}}
-            # Example: {(0, 0): {"left": 0.123, ..., "up": 0.456}}
-
-            state=position
-
-            #max_action=max(available_table[position],key=available_table[position].get)
-            max_q= max(self.q_table[position].values())
-            if max_q < 0.0000001:
-                max_q=0
-
-            pick=[]
-            if self.q_table[position]["up"]>=max_q and "up" in self.env.get_possible_actions(position):
-                pick.append("up")
-
-            if self.q_table[position]["down"]>=max_q and "down" in self.env.get_possible_actions(position):
-                pick.append("down")
-
-            if self.q_table[position]["left"]>=max_q and "left" in self.env.get_possible_actions(position):
-                pick.append("left")
-
-            if self.q_table[position]["right"]>=max_q and "right" in self.env.get_possible_actions(position):
-                pick.append("right")
-
-            new_action=random.choice(pick)
-
-            pick.clear()
-
-            #print(new_action)
-
+        if x >= self.get_epsilon(position):
+            # Break ties randomly among the cached maximal actions.
+            new_action=random.choice(self.max_actions[position])
 
         else:
-             new_action=random.choice(self.env.get_possible_actions(position))
+             new_action=random.choice(self.possible_actions[position])
 
 
         return new_action
@@ -262,6 +276,95 @@ class Agent:
         """Get Q table."""
         return self.q_table
 
+    def set_q_value(self, position, action, value):
+        """Set a Q value and keep the per-state max cache up to date.
+
+        Args:
+            position: A tuple of position where the action is taken.
+            action: A string of action taken at the position.
+            value: The new Q value.
+        """
+        self.q_table[position][action] = value
+        if action not in self.possible_actions[position]:
+            return
+
+        max_actions = self.max_actions[position]
+        if value > self.max_q[position]:
+            self.max_q[position] = value
+            max_actions[:] = [action]
+        elif value == self.max_q[position]:
+            if action not in max_actions:
+                max_actions.append(action)
+        elif action in max_actions:
+            if len(max_actions) > 1:
+                max_actions.remove(action)
+            else:
+                # The only maximal action dropped, rescan the possible actions of this state.
+                action_values = self.q_table[position]
+                self.max_q[position] = max(action_values[a] for a in self.possible_actions[position])
+                max_actions[:] = [a for a in self.possible_actions[position] if action_values[a] == self.max_q[position]]
+
+    def count_visit(self, position, action):
+        """Count a visit of the state-action pair.
+
+        Args:
+            position: A tuple of position where the action is taken.
+            action: A string of action taken at the position.
+        """
+        self.state_action_visits[position[0], position[1], self.env.get_actions()[action]] += 1
+        self.state_visits[position[0], position[1]] += 1
+
+    def get_learning_alpha(self, position, action):
+        """Get learning rate for updating the state-action pair.
+
+        Args:
+            position: A tuple of position where the action is taken.
+            action: A string of action taken at the position.
+
+        Returns:
+            The constant learning_alpha, or 1/n^alpha_power in the count schedule.
+        """
+        if self.alpha_schedule != "count":
+            return self.learning_alpha
+        visits = self.state_action_visits[position[0], position[1], self.env.get_actions()[action]]
+        if visits == 0:
+            return 1
+        return max(self.min_alpha, 1 / float(visits) ** self.alpha_power)
+
+    def get_epsilon(self, position):
+        """Get exploration probability at a position.
+
+        Args:
+            position: A tuple of position to get action.
+
+        Returns:
+            The global epsilon, or exploration_c/sqrt(n) in the count schedule.
+        """
+        if self.exploration_schedule != "count":
+            return self.epsilon
+        visits = self.state_visits[position[0], position[1]]
+        if visits == 0:
+            return 1
+        return min(1, max(self.min_epsilon, self.exploration_c / np.sqrt(visits)))
+
+    def get_greedy_policy(self):
+        """Get greedy policy from the Q table.
+
+        Returns:
+            A dictionary in the format {state: (action, ...)} holding all maximal possible actions of each state.
+        """
+        policy = {}
+        for state, max_actions in self.max_actions.items():
+            policy[state] = tuple(sorted(max_actions))
+        return policy
+
+    def update_policy_stats(self):
+        """Record the step at which the greedy policy last changed."""
+        policy = self.get_greedy_policy()
+        if policy != self.greedy_policy:
+            self.greedy_policy = policy
+            self.policy_stable_step = self.total_steps
+
     def decay_epsilon_greedy(self):
         """Decay epsilon greedy implementation.
 
@@ -285,79 +388,184 @@ class Agent:
 
         Use primarily for toggling displaying Q values.
         """
+        # Redraw at most FPS times per second while idle.
+        sleep(1 / self.env.FPS)
         self.env.display(self.max_episode, self.max_episode, self.q_table)
-        return self.env.update()
-
-    def train(self):
-        """Train the agent using Q-Learning.
+        if not self.env.handle_events():
+            return False
+        self.env.refresh()
+        return True
 
-        This method is required to be filled in.
+    def record_greedy_rollout(self):
+        """Record one episode following the greedy policy without learning.
 
         Returns:
-            DONE_TRAINING: When ran through the input maximum episode.
-            QUIT: When hit close button on the game screen.
+            False when hit close button on the game screen, otherwise True.
+        """
+        self.env.reset()
+        self.recorder.start("greedy_rollout")
+        # Stop a policy walking in circles.
+        max_steps = 4 * self.env.get_grid_size() ** 2
+        for _ in range(max_steps):
+            self.env.display(self.max_episode, self.max_episode, self.q_table)
+            self.recorder.capture(self.env.get_screen())
+            position = self.env.get_current_position()
+            if self.restart(position):
+                break
+            self.env.move(random.choice(self.max_actions[position]))
+            if not self.env.update():
+                self.recorder.stop()
+                return False
+        self.recorder.stop()
+        return True
+
+    def start_episode(self, episode):
+        """Reset the environment before starting a new episode.
+
+        Args:
+            episode: Episode number.
+        """
+        self.env.reset()
+        self.steps=0
+        if self.recorder is not None and self.recorder.should_record(episode):
+            self.recorder.start(f"episode_{episode:05d}")
+
+    def draw_frame(self, episode, draw):
+        """Draw the current frame, and capture it if the episode is being recorded.
+
+        Args:
+            episode: Episode number.
+            draw: Draw the frame even if the episode is not being recorded.
+        """
+        recording = self.recorder is not None and self.recorder.is_recording()
+        if draw or recording:
+            self.env.display(episode, self.max_episode, self.q_table)
+        if recording:
+            self.recorder.capture(self.env.get_screen())
+
+    def run_episodes(self, draw=False):
+        """Run the training episodes, yielding the episode number after every step.
+
+        Both train() and the interactive Session drive training through this loop. Closing the generator finishes the current episode.
+
+        Args:
+            draw: Draw every frame before its step. Frames of recorded episodes are always drawn.
         """
         print("Training...")
-        status = self.Status.DONE_TRAINING
-        start = time()
         for episode in range(self.max_episode):
-            # Reset the environment before starting a new episode.
-            self.env.reset()
-            episode_done = False
-            while not episode_done:
-                sleep(self.env.get_speed())
-                self.env.display(episode, self.max_episode, self.q_table)
+            self.start_episode(episode)
+            try:
+                episode_done = False
+                while not episode_done:
+                    self.draw_frame(episode, draw)
+                    episode_done = self.train_step()
+                    yield episode
+            finally:
+                self.finish_episode()
+
+    def train_step(self):
+        """Move the robot one step and update the Q table.
 
-                # FOR STUDENT: Start fill in this code section.
-                # The lines of code below act as a placeholder to generate random moves for the robot. The student must delete all these lines before implementation.
+        Returns:
+            True when the episode is done, otherwise False.
+        """
+        # FOR STUDENT: Start fill in this code section.
+        # The lines of code below act as a placeholder to generate random moves for the robot. The student must delete all these lines before implementation.
 
 
 
-                state=self.env.get_current_position()
-                action=self.get_action(state)
-                self.env.move(action)
-                next_state=self.env.get_current_position()
-                reward=self.get_reward(next_state)
+        state=self.env.get_current_position()
+        action=self.get_action(state)
+        self.env.move(action)
+        next_state=self.env.get_current_position()
+        reward=self.get_reward(next_state)
+        self.env.update_status()
+        self.count_visit(state, action)
+        alpha=self.get_learning_alpha(state, action)
+        self.steps+=1
 
-                if self.restart(state):
-                    self.q_table[state][action] = (1-self.learning_alpha)*self.q_table[state][action]+self.learning_alpha*reward
-                    self.decay_epsilon_greedy()
+        if self.restart(state):
+            self.set_q_value(state, action, (1-alpha)*self.q_table[state][action]+alpha*reward)
+            self.decay_epsilon_greedy()
 
-                    self.accumulate_reward.append(self.episode_reward)
-                    self.episode_reward=0
-                    episode_done=True
+            self.accumulate_reward.append(self.episode_reward)
+            self.episode_reward=0
+            self.episode_steps.append(self.steps)
+            self.total_steps+=self.steps
+            self.update_policy_stats()
+            return True
 
 
-                else:
-                     self.q_table[state][action] = (1-self.learning_alpha)*self.q_table[state][action]+self.learning_alpha*(reward+self.discounting_gamma*max(list(self.q_table[next_state].values())))
-                     self.episode_reward=self.episode_reward+reward
+        else:
+             self.set_q_value(state, action, (1-alpha)*self.q_table[state][action]+alpha*(reward+self.discounting_gamma*self.max_q[next_state]))
+             self.episode_reward=self.episode_reward+reward
 
 
 
 
-                # End of code section
+        # End of code section
+        return False
 
-                if not self.env.update():
-                    status = self.Status.QUIT
-                    break
-            if status == self.Status.QUIT:
-                self.plot()
-                break
+    def finish_episode(self):
+        """Finish recording the episode."""
+        if self.recorder is not None:
+            self.recorder.stop()
+
+    def finish_training(self, status, start):
+        """Report training stats and record the final greedy rollout.
 
+        Args:
+            status: Status of agent after training.
+            start: Time when training started.
 
+        Returns:
+            QUIT when hit close button during the rollout, otherwise the input status.
+        """
         # if not hitting close button, then the status will remain as initialised.
         if status == self.Status.DONE_TRAINING:
             end = time()
             print(f"Done training. Elapsed time: {(end - start)/60} mins")
+            print(f"Environment steps: {self.total_steps}. Greedy policy last changed at step {self.policy_stable_step}.")
 
-            # Keep updating screen for the student to capture screen with Q values.
-            while self.pause():
-                pass
+            if self.recorder is not None:
+                if not self.record_greedy_rollout():
+                    status = self.Status.QUIT
+                self.recorder.close()
         elif status == self.Status.QUIT:
 
             print("Quit game.")
+            if self.recorder is not None:
+                self.recorder.close()
+        return status
 
+    def train(self):
+        """Train the agent using Q-Learning.
 
+        This method is required to be filled in.
 
+        Returns:
+            DONE_TRAINING: When ran through the input maximum episode.
+            QUIT: When hit close button on the game screen.
+        """
+        status = self.Status.DONE_TRAINING
+        start = time()
+        # Offscreen frames are only drawn when they are recorded.
+        episodes = self.run_episodes(not self.env.is_headless())
+        for episode in episodes:
+            if not self.env.handle_events():
+                status = self.Status.QUIT
+                break
+            self.env.refresh()
+            sleep(self.env.get_speed())
+        episodes.close()
+        if status == self.Status.QUIT:
+            self.plot()
+
+        status = self.finish_training(status, start)
+
+        # Keep updating screen for the student to capture screen with Q values.
+        if not self.env.is_headless() and status == self.Status.DONE_TRAINING:
+            while self.pause():
+                pass
 
         return status
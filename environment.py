@@ -76,6 +76,10 @@ class Environment:
             Either be "Collected diamond", "Exploded", or "Treasure found".
         current_position:
             The robot's current position. It's a list.
+        exposed:
+            True after the game window was exposed or restored and needs to be redrawn. Cleared by whoever redraws it.
+        headless:
+            If headless is true, the game is drawn on an offscreen surface using the pygame dummy video driver and there is no delay between moves.
     """
     BLACK = (0, 0, 0)
     WHITE = (255, 255, 255)
@@ -84,13 +88,20 @@ class Environment:
     GAME_CAPTION = 'ELEC ENG 4107 Treasure Island'
     ACTIONS = {"up": 0, "down": 1, "left": 2, "right": 3}
     FONT_Q_VALUE, FONT_Q_VALUE_SIZE = 'font/cour.ttf', 11
-    def __init__(self, level):
+    FPS = 30
+    # Events telling that the game window needs to be redrawn. WINDOW* events only exist in pygame 2.
+    EXPOSE_EVENTS = tuple(getattr(pg, name) for name in ("VIDEOEXPOSE", "WINDOWEXPOSED", "WINDOWRESTORED") if hasattr(pg, name))
+    def __init__(self, level, headless=False):
         """Init Environment class."""
         self.level = Level(level)
         self.grid_size = self.level.get_grid_size()
         self.window_width = self.grid_size * 100
         self.window_height = self.grid_size * 100 + 100
         self.treasure_position = (self.grid_size - 1, self.grid_size - 1)
+        self.headless = headless
+        if self.headless:
+            # Draw on an in-memory surface, no window is needed.
+            os.environ['SDL_VIDEODRIVER'] = "dummy"
         pg.init()
         self.status_font = pg.font.SysFont(self.FONT_GAME_STATUS, self.FONT_GAME_STATUS_SIZE)
         self.q_value_font = pg.font.SysFont(self.FONT_Q_VALUE, self.FONT_Q_VALUE_SIZE)
@@ -114,8 +125,9 @@ class Environment:
         self.simple_treasure = pg.transform.scale(self.simple_treasure, (50, 50))
         self.simple_robot = pg.image.load(r'images/simple_robot.png')
         self.simple_robot = pg.transform.scale(self.simple_robot, (50, 50))
-        self.speed = 0.5
+        self.speed = 0 if self.headless else 0.5
         self.debug_mode = False
+        self.exposed = False
         self.reset()
         print("Environment initialised.")
 
@@ -135,6 +147,14 @@ class Environment:
         """
         return self.speed
 
+    def is_headless(self):
+        """Check if the game is drawn offscreen."""
+        return self.headless
+
+    def get_screen(self):
+        """Get the game screen surface."""
+        return self.screen
+
     def get_grid_size(self):
         """Get the number of grids."""
         return self.grid_size
@@ -322,8 +342,8 @@ class Environment:
             elif action == "right":
                 self.current_position[1] += 1
 
-    def update(self):
-        """Update the game screen."""
+    def update_status(self):
+        """Update scores and game status at the robot's current position."""
         if tuple(self.current_position) in self.diamond_map:
             self.diamond_map.remove(tuple(self.current_position))
             self.robot_status = "Collected diamond"
@@ -336,10 +356,18 @@ class Environment:
             self.game_status = "You won!"
             self.scores += 10
 
+    def handle_events(self):
+        """Handle pending keyboard and window events.
+
+        Returns:
+            False when hit close button on the game screen, otherwise True.
+        """
         for event in pg.event.get():
             if event.type == pg.QUIT:
                 pg.quit()
                 return False
+            if event.type in self.EXPOSE_EVENTS:
+                self.exposed = True
             if event.type == pg.KEYDOWN:
                 # Reduce delay between moves
                 if event.key == pg.K_x:
@@ -353,6 +381,16 @@ class Environment:
                 # Toggle displaying Q values
                 if event.key == pg.K_SPACE:
                     self.debug_mode ^= True
+        return True
 
+    def refresh(self):
+        """Show the drawn frame on the game screen."""
         pg.display.update()
-        return True
\ No newline at end of file
+
+    def update(self):
+        """Update the game screen."""
+        self.update_status()
+        if not self.handle_events():
+            return False
+        self.refresh()
+        return True
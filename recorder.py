@@ -0,0 +1,130 @@
+"""Offscreen frame recorder
+
+This module is for saving the game screen of selected episodes as PNG sequences or animated GIF files. Frames are copied from the screen surface on the training thread and encoded on a background thread, so recording slows down training as little as possible.
+"""
+import os
+import queue
+import threading
+import pygame as pg
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+class FrameRecorder:
+    """Frame recorder.
+
+    Every recorded episode is called a clip. A PNG clip is saved as a folder of numbered frames, a GIF clip is saved as one animated file.
+
+    Attributes:
+        output_dir:
+            Folder to save the clips.
+        every:
+            Record every Kth training episode. 0 disables recording training episodes.
+        fmt:
+            Either be "png" or "gif".
+        frame_duration:
+            Duration of each frame in GIF clips in seconds.
+        max_frames:
+            Maximum number of frames kept per clip. Frames after this are dropped.
+    """
+    FORMATS = ("png", "gif")
+    QUEUE_SIZE = 256
+    def __init__(self, output_dir, every=0, fmt="png", frame_duration=0.2, max_frames=500):
+        """Init FrameRecorder class and start the encoding thread."""
+        if fmt not in self.FORMATS:
+            raise ValueError(f"Recording format is one of {', '.join(self.FORMATS)}")
+        if fmt == "gif" and Image is None:
+            raise ImportError("Recording GIF clips requires Pillow.")
+        self.output_dir = output_dir
+        self.every = every
+        self.fmt = fmt
+        self.frame_duration = frame_duration
+        self.max_frames = max_frames
+        self.clip = None
+        self.num_frames = 0
+        os.makedirs(self.output_dir, exist_ok=True)
+
+        # Jobs in the format (command, payload).
+        self.jobs = queue.Queue(self.QUEUE_SIZE)
+        self.worker = threading.Thread(target=self.encode, daemon=True)
+        self.worker.start()
+
+    def should_record(self, episode):
+        """Check if a training episode should be recorded.
+
+        Args:
+            episode: Episode number.
+        """
+        return self.every > 0 and episode % self.every == 0
+
+    def is_recording(self):
+        """Check if a clip is being recorded."""
+        return self.clip is not None
+
+    def start(self, name):
+        """Start recording a new clip.
+
+        Args:
+            name: Name of the clip. Used as the folder name for PNG clips and the file name for GIF clips.
+        """
+        self.clip = name
+        self.num_frames = 0
+        self.jobs.put(("start", name))
+
+    def capture(self, surface):
+        """Copy a frame of the surface to the current clip.
+
+        Args:
+            surface: Pygame surface to capture. Usually the game screen.
+        """
+        if self.clip is None or self.num_frames >= self.max_frames:
+            return
+        self.num_frames += 1
+        self.jobs.put(("frame", (surface.get_size(), pg.image.tostring(surface, "RGB"))))
+
+    def stop(self):
+        """Finish the current clip."""
+        if self.clip is None:
+            return
+        self.jobs.put(("stop", None))
+        self.clip = None
+
+    def close(self):
+        """Finish the current clip and wait until all frames are encoded."""
+        self.stop()
+        self.jobs.put(("close", None))
+        self.worker.join()
+
+    def encode(self):
+        """Encode frames on the background thread until the recorder is closed.
+
+        A clip that fails to encode is reported and dropped, and the queue keeps being drained so training is never blocked.
+        """
+        clip, frames, failed = None, [], False
+        while True:
+            command, payload = self.jobs.get()
+            if command == "close":
+                break
+            try:
+                if command == "start":
+                    clip, frames, failed = payload, [], False
+                    if self.fmt == "png":
+                        os.makedirs(os.path.join(self.output_dir, clip), exist_ok=True)
+                elif command == "frame" and not failed:
+                    size, data = payload
+                    if self.fmt == "png":
+                        path = os.path.join(self.output_dir, clip, f"frame_{len(frames):05d}.png")
+                        pg.image.save(pg.image.fromstring(data, size, "RGB"), path)
+                        frames.append(path)
+                    else:
+                        frames.append(Image.frombytes("RGB", size, data))
+                elif command == "stop":
+                    if self.fmt == "gif" and frames and not failed:
+                        path = os.path.join(self.output_dir, f"{clip}.gif")
+                        frames[0].save(path, save_all=True, append_images=frames[1:], duration=int(self.frame_duration * 1000), loop=0)
+                    clip, frames = None, []
+            except Exception as error:
+                print(f"Recording {clip} failed: {error}")
+                failed, frames = True, []
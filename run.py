@@ -5,15 +5,31 @@ Treasure Island is a grid game designed for ELEC ENG 4107 Autonomous System to l
 
 """
 from agent import Agent
+from recorder import FrameRecorder
+from session import Session
 import argparse
 
-def run(level):
-    agent = Agent(level)
-    agent.train()
+def run(level, headless=False, record_every=0, record_dir=None, record_format="png"):
+    recorder = None
+    if record_dir is not None:
+        recorder = FrameRecorder(record_dir, record_every, record_format)
+    agent = Agent(level, headless, recorder)
+    Session(agent).run()
     agent.plot()
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='ELEC ENG 4107 Treasure Island Solver.')
     parser.add_argument('-lv', "--level", choices=['easy', 'hard'], help='Game level (easy or hard).', required=True)
+    parser.add_argument("--headless", action='store_true', help='Draw the game offscreen without opening a window. Only the reward plot and the recorded episodes (with --record-dir) are shown.')
+    parser.add_argument("--record-dir", help='Folder to save recorded episodes. The final greedy rollout is always recorded.')
+    parser.add_argument("--record-every", type=int, default=0, help='Also record every Kth training episode (0 to disable). Requires --record-dir.')
+    parser.add_argument("--record-format", choices=['png', 'gif'], help='PNG frame sequences or animated GIF files (default: png). Requires --record-dir.')
     args = parser.parse_args()
-    run(args.level)
\ No newline at end of file
+    if args.record_dir is None:
+        if args.record_every > 0:
+            parser.error("--record-every requires --record-dir")
+        if args.record_format is not None:
+            parser.error("--record-format requires --record-dir")
+        if args.headless:
+            print("Running headless without --record-dir: only the reward plot will be shown.")
+    run(args.level, args.headless, args.record_every, args.record_dir, args.record_format or 'png')
\ No newline at end of file
@@ -0,0 +1,122 @@
+"""Interactive Treasure Island session
+
+This module runs training and the game screen as asyncio coroutines: one handles keyboard and window events, one redraws the screen, and one trains the agent, yielding at least once per frame. The delay between moves is an asyncio sleep, so speed and debug toggles take effect immediately, and when training is done the screen is only redrawn after an event changes it.
+"""
+import asyncio
+from time import time
+
+class Session:
+    """Interactive session.
+
+    Attributes:
+        agent:
+            Q-Learning agent class instance.
+        env:
+            Game environment class instance of the agent.
+        episode:
+            Current episode number to display on the game screen.
+        status:
+            Status of agent after training.
+        running:
+            False after hitting close button on the game screen.
+        dirty:
+            If dirty is true, the game screen is redrawn on the next frame.
+    """
+    def __init__(self, agent):
+        """Init Session class."""
+        self.agent = agent
+        self.env = agent.env
+        self.episode = 0
+        self.status = agent.Status.DONE_TRAINING
+        self.running = True
+        self.dirty = True
+
+    def run(self):
+        """Run the session until training is done and the game screen is closed.
+
+        Returns:
+            DONE_TRAINING: When ran through the input maximum episode.
+            QUIT: When hit close button on the game screen.
+        """
+        return asyncio.run(self.main())
+
+    async def main(self):
+        """Start the coroutines and wait for them to finish."""
+        # Set when the speed changes or the game screen is closed to end the delay between moves early.
+        self.wakeup = asyncio.Event()
+        tasks = []
+        if not self.env.is_headless():
+            tasks.append(asyncio.create_task(self.handle_events()))
+            tasks.append(asyncio.create_task(self.render()))
+
+        start = time()
+        await self.train()
+        self.status = self.agent.finish_training(self.status, start)
+
+        # Keep the game screen for the student to capture screen with Q values.
+        if tasks and self.status == self.agent.Status.DONE_TRAINING:
+            self.episode = self.agent.max_episode
+            self.dirty = True
+            await tasks[0]
+        self.running = False
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        return self.status
+
+    async def wait(self, delay):
+        """Sleep for the delay between moves unless woken up earlier.
+
+        Args:
+            delay: Delay in seconds.
+        """
+        self.wakeup.clear()
+        try:
+            await asyncio.wait_for(self.wakeup.wait(), delay)
+        except asyncio.TimeoutError:
+            pass
+
+    async def train(self):
+        """Train the agent, yielding to the other coroutines at least once per frame."""
+        frame = 1 / self.env.FPS
+        last_yield = time()
+        episodes = self.agent.run_episodes()
+        for episode in episodes:
+            self.episode = episode
+            self.dirty = True
+            speed = self.env.get_speed()
+            if speed > 0:
+                await self.wait(speed)
+                last_yield = time()
+            elif time() - last_yield >= frame:
+                await asyncio.sleep(0)
+                last_yield = time()
+            if not self.running:
+                self.status = self.agent.Status.QUIT
+                break
+        episodes.close()
+
+    async def handle_events(self):
+        """Handle events once per frame until hit close button on the game screen."""
+        while self.running:
+            speed, debug_mode = self.env.get_speed(), self.env.debug_mode
+            if not self.env.handle_events():
+                self.running = False
+                self.wakeup.set()
+                break
+            if speed != self.env.get_speed():
+                self.wakeup.set()
+                self.dirty = True
+            if debug_mode != self.env.debug_mode or self.env.exposed:
+                self.env.exposed = False
+                self.dirty = True
+            await asyncio.sleep(1 / self.env.FPS)
+
+    async def render(self):
+        """Redraw the game screen at most once per frame when it has changed."""
+        while self.running:
+            await asyncio.sleep(1 / self.env.FPS)
+            if self.running and self.dirty:
+                self.env.display(self.episode, self.agent.max_episode, self.agent.q_table)
+                self.env.refresh()
+                self.dirty = False